@@ -1,15 +1,23 @@
 import os
 import sqlite3
-from typing import List, Tuple
+import threading
+from itertools import islice
+from typing import Iterable, Set, Tuple
 
 from loguru import logger
 
+INSERT_CHUNK_SIZE = 5000
+INSERT_SQL = (
+    "INSERT OR IGNORE INTO plex_library_files (library_key, file_path) VALUES (?, ?)"
+)
+
 
 class DatabaseManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.connection = None
         self.cursor = None
+        self.lock = threading.Lock()  # Serialises writers sharing the connection
         self.connect()
 
     def connect(self):
@@ -17,16 +25,26 @@ class DatabaseManager:
             if os.path.exists(self.db_path):
                 os.remove(self.db_path)
                 logger.info(f"Removed existing database at {self.db_path}")
-            self.connection = sqlite3.connect(self.db_path)
+            self.connection = sqlite3.connect(
+                self.db_path,
+                isolation_level=None,
+                cached_statements=256,
+                check_same_thread=False,
+            )
             self.cursor = self.connection.cursor()
             logger.info(f"Connected to database at {self.db_path}")
 
+            self.cursor.execute("PRAGMA journal_mode=WAL")
+            self.cursor.execute("PRAGMA synchronous=NORMAL")
+            self.cursor.execute("PRAGMA temp_store=MEMORY")
+            self.cursor.execute("PRAGMA cache_size=-65536")
+
             self.cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS plex_library_files (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     library_key INTEGER NOT NULL,
-                    file_path TEXT NOT NULL UNIQUE
+                    file_path TEXT NOT NULL
                 )
                 """
             )
@@ -37,25 +55,87 @@ class DatabaseManager:
             logger.error(f"Failed to remove existing database: {e}")
             self.connection = None
 
-    def insert_plex_library_files(self, data: List[Tuple[int, str]]) -> None:
+    def insert_plex_library_files(self, data: Iterable[Tuple[int, str]]) -> int:
+        if not self.connection:
+            logger.error("Database connection is not established.")
+            return 0
+
+        rows = iter(data)
+        inserted = 0
+
+        # Each chunk commits in its own transaction and only holds the lock for
+        # the write, so callers streaming from Plex in parallel can interleave.
+        while chunk := list(islice(rows, INSERT_CHUNK_SIZE)):
+            with self.lock:
+                try:
+                    self.cursor.execute("BEGIN IMMEDIATE")
+                    self.cursor.executemany(INSERT_SQL, chunk)
+                    inserted += self.cursor.rowcount
+                    self.connection.commit()
+                except sqlite3.Error as e:
+                    self._rollback()
+                    logger.error(f"Failed to insert records into database: {e}")
+                    return inserted
+                except Exception as e:
+                    self._rollback()
+                    logger.error(
+                        f"Unexpected error inserting records into database: {e}"
+                    )
+                    return inserted
+            logger.debug("Inserted {} records so far...", inserted)
+
+        logger.info(f"Inserted {inserted} records into plex_library_files.")
+        return inserted
+
+    def finalize_bulk_load(self) -> None:
+        """Build the lookup index once the initial cache has been loaded"""
         if not self.connection:
             logger.error("Database connection is not established.")
             return
 
         try:
-            self.cursor.executemany(
+            self.cursor.execute("BEGIN IMMEDIATE")
+            # Multi-episode files show up once per episode, so dedupe before indexing
+            self.cursor.execute(
+                """
+                DELETE FROM plex_library_files
+                WHERE id NOT IN (
+                    SELECT MIN(id) FROM plex_library_files
+                    GROUP BY library_key, file_path
+                )
+                """
+            )
+            self.cursor.execute(
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_library_key_file_path
+                ON plex_library_files (library_key, file_path)
                 """
-                INSERT OR IGNORE INTO plex_library_files (library_key, file_path)
-                VALUES (?, ?)
-                """,
-                [(key, path) for key, path in data],
             )
             self.connection.commit()
-            logger.info(f"Inserted {len(data)} records into plex_library_files.")
+            self.cursor.execute("ANALYZE")
+            logger.info("Finalized plex_library_files bulk load.")
+        except sqlite3.Error as e:
+            self._rollback()
+            logger.error(f"Failed to finalize bulk load: {e}")
+
+    def get_cached_library_files(self) -> Set[Tuple[int, str]]:
+        if not self.connection:
+            logger.error("Database connection is not established.")
+            return set()
+
+        try:
+            return set(
+                self.cursor.execute(
+                    "SELECT library_key, file_path FROM plex_library_files"
+                )
+            )
         except sqlite3.Error as e:
-            logger.error(f"Failed to insert records into database: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error inserting records into database: {e}")
+            logger.error(f"Failed to load cached records from database: {e}")
+            return set()
+
+    def _rollback(self):
+        if self.connection and self.connection.in_transaction:
+            self.connection.rollback()
 
     def close(self):
         if self.connection:
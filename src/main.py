@@ -1,7 +1,10 @@
+import os
+import signal
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, NamedTuple
+from typing import Dict, Iterable, List, NamedTuple, Optional
 
 from loguru import logger
 from watchdog.events import FileSystemEvent, FileSystemEventHandler
@@ -15,48 +18,93 @@ from src.settings import load_or_create_settings
 class PendingScan(NamedTuple):
     library_key: str
     parent_dir: str
-    timestamp: float
+    first_timestamp: float
+    last_timestamp: float
+
+
+def coalesce_scans(scans: Iterable[PendingScan]) -> List[PendingScan]:
+    """Drop scans whose directory is already covered by a scan of an ancestor"""
+    kept: Dict[str, List[str]] = {}  # library_key -> kept directory prefixes
+    coalesced = []
+
+    for scan in sorted(scans, key=lambda scan: len(scan.parent_dir)):
+        prefixes = kept.setdefault(scan.library_key, [])
+        if any(
+            scan.parent_dir == prefix.rstrip(os.sep)
+            or scan.parent_dir.startswith(prefix)
+            for prefix in prefixes
+        ):
+            continue
+        prefixes.append(scan.parent_dir.rstrip(os.sep) + os.sep)
+        coalesced.append(scan)
+
+    return coalesced
 
 
 class BatchScanManager:
-    def __init__(self, plex: Plex, delay_seconds: int = 30):
+    def __init__(self, plex: Plex, delay_seconds: int = 30, idle_seconds: float = 1):
         self.plex = plex
-        self.delay_seconds = delay_seconds
+        self.delay_seconds = delay_seconds  # Upper bound on how long a scan is held
+        self.idle_seconds = idle_seconds  # Quiet period after the latest event
         self.pending_scans: Dict[
             str, PendingScan
         ] = {}  # Key: f"{library_key}:{parent_dir}"
         self.lock = threading.Lock()
-        self.timer_thread = None
-        self.stop_event = threading.Event()
+        self.cv = threading.Condition(self.lock)
+        self._stopped = False
+        self._worker = threading.Thread(target=self._batch_processor, daemon=True)
+        self._worker.start()
 
     def add_scan_request(self, library_key: str, parent_dir: str):
         """Add a scan request to the batch queue"""
         scan_key = f"{library_key}:{parent_dir}"
-        current_time = time.time()
+        current_time = time.monotonic()
 
-        with self.lock:
+        with self.cv:
+            existing = self.pending_scans.get(scan_key)
             self.pending_scans[scan_key] = PendingScan(
-                library_key=library_key, parent_dir=parent_dir, timestamp=current_time
+                library_key=library_key,
+                parent_dir=parent_dir,
+                first_timestamp=existing.first_timestamp if existing else current_time,
+                last_timestamp=current_time,
             )
-            logger.debug(f"Added scan request to batch: {scan_key}")
+            logger.debug("Added scan request to batch: {}", scan_key)
+            self.cv.notify()
+
+    def _due_time(self, scan: PendingScan) -> float:
+        """A scan fires once its directory goes quiet, or when it has waited too long"""
+        return min(
+            scan.last_timestamp + self.idle_seconds,
+            scan.first_timestamp + self.delay_seconds,
+        )
+
+    def _collect_ready_scans(self) -> Optional[List[PendingScan]]:
+        """Block until scans are due and return them; None means exit"""
+        with self.cv:
+            while True:
+                if self._stopped:
+                    return None
+                if not self.pending_scans:
+                    self.cv.wait()
+                    continue
 
-        if self.timer_thread is None or not self.timer_thread.is_alive():
-            self.timer_thread = threading.Thread(
-                target=self._batch_processor, daemon=True
-            )
-            self.timer_thread.start()
+                current_time = time.monotonic()
+                next_fire = min(
+                    self._due_time(scan) for scan in self.pending_scans.values()
+                )
+                if next_fire <= current_time:
+                    break
+                self.cv.wait(timeout=next_fire - current_time)
 
-    def _batch_processor(self):
-        while not self.stop_event.is_set():
-            current_time = time.time()
             ready_scans = []
+            for scan_key, pending_scan in list(self.pending_scans.items()):
+                if self._due_time(pending_scan) <= current_time:
+                    ready_scans.append(pending_scan)
+                    del self.pending_scans[scan_key]
+            return coalesce_scans(ready_scans)
 
-            with self.lock:
-                for scan_key, pending_scan in list(self.pending_scans.items()):
-                    if current_time - pending_scan.timestamp >= self.delay_seconds:
-                        ready_scans.append(pending_scan)
-                        del self.pending_scans[scan_key]
-
+    def _batch_processor(self):
+        while (ready_scans := self._collect_ready_scans()) is not None:
             for scan in ready_scans:
                 try:
                     logger.info(
@@ -66,18 +114,12 @@ class BatchScanManager:
                 except Exception as e:
                     logger.error(f"Error executing batched scan: {e}")
 
-            with self.lock:
-                if not self.pending_scans:
-                    break
-
-            time.sleep(1)
-
     def shutdown(self):
-        self.stop_event.set()
-
-        with self.lock:
-            remaining_scans = list(self.pending_scans.values())
+        with self.cv:
+            self._stopped = True
+            remaining_scans = coalesce_scans(self.pending_scans.values())
             self.pending_scans.clear()
+            self.cv.notify_all()
 
         for scan in remaining_scans:
             try:
@@ -88,8 +130,7 @@ class BatchScanManager:
             except Exception as e:
                 logger.error(f"Error processing remaining scan: {e}")
 
-        if self.timer_thread and self.timer_thread.is_alive():
-            self.timer_thread.join(timeout=5)
+        self._worker.join(timeout=5)
 
 
 class RescanEventHandler(FileSystemEventHandler):
@@ -100,7 +141,10 @@ class RescanEventHandler(FileSystemEventHandler):
         self.batch_manager = BatchScanManager(plex, delay_seconds=30)
 
     def _is_media_file(self, file_path: str) -> bool:
-        return Path(file_path).suffix.lower() in self.settings.media_extensions
+        return (
+            os.path.splitext(file_path)[1].lower()
+            in self.settings.media_extensions_set
+        )
 
     def _should_process_event(self, event: FileSystemEvent) -> bool:
         if not self._is_media_file(event.src_path):
@@ -119,7 +163,7 @@ class RescanEventHandler(FileSystemEventHandler):
 
         library = self.plex.find_library_by_path(event.src_path)
         if library:
-            parent_dir = str(Path(event.src_path).parent)
+            parent_dir = os.path.dirname(event.src_path)
             logger.info(f"Found library for file: {library.title} ({library.key})")
 
             self.batch_manager.add_scan_request(library.key, parent_dir)
@@ -148,7 +192,9 @@ def main():
 
     for library, key in plex.library_ids.items():
         logger.info(f"Library: {library} (Key: {key})")
-        plex.cache_library_files(key)
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(plex.library_ids)))) as ex:
+        list(ex.map(plex.cache_library_files, plex.library_ids.values()))
+    db.finalize_bulk_load()
 
     plex.full_scan()
 
@@ -161,22 +207,22 @@ def main():
             continue
         observer.schedule(event_handler, path=path, recursive=True)
 
-    logger.info(f"Monitoring library path: {settings.library_paths}")
-    observer.start()
-
-    try:
-        logger.info("Starting file system observer...")
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("Shutting down...")
+    def handle_shutdown_signal(signum, frame):
+        logger.info(f"Received {signal.Signals(signum).name}, shutting down...")
         observer.stop()
-        event_handler.shutdown()
-        db.close()
 
+    signal.signal(signal.SIGINT, handle_shutdown_signal)
+    signal.signal(signal.SIGTERM, handle_shutdown_signal)
+
+    logger.info(f"Monitoring library path: {settings.library_paths}")
+    logger.info("Starting file system observer...")
+    observer.start()
     observer.join()
     logger.info("Observer stopped.")
 
+    event_handler.shutdown()
+    db.close()
+
 
 if __name__ == "__main__":
     main()
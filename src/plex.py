@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Dict, List, NamedTuple, Optional
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 from loguru import logger
 from plexapi.exceptions import PlexApiException
@@ -21,13 +21,20 @@ class Plex:
         self.db = db
         self.url = settings.plex.url
         self.token = settings.plex.token
-        self.media_extensions = settings.media_extensions
+        self.media_extensions = settings.media_extensions_set
         self.local_library_paths = settings.library_paths
         self.server = None
         self.connect()
         self.library_sections = self.get_library_sections()
-        self.library_ids = self.get_library_ids()
-        self.library_locations = self.get_library_locations()
+        self.library_ids: Dict[str, str] = {}
+        self.library_locations: Dict[str, List[str]] = {}
+        self.location_index: Dict[str, LibraryInfo] = {}
+        for section in self.library_sections:
+            self.library_ids[section.title] = section.key
+            self.library_locations[section.title] = section.locations
+            for location in section.locations:
+                location = location.rstrip(os.sep) or os.sep
+                self.location_index.setdefault(location, section)
 
     def connect(self):
         try:
@@ -40,10 +47,10 @@ class Plex:
             logger.error(f"Unexpected error connecting to Plex server: {e}")
             self.server = None
 
-    def get_library_sections(self) -> List[LibraryInfo]:
+    def get_library_sections(self) -> Tuple[LibraryInfo, ...]:
         if not self.server:
             logger.error("Plex server is not connected.")
-            return []
+            return ()
 
         try:
             sections = []
@@ -59,40 +66,41 @@ class Plex:
                 )
                 sections.append(library_info)
                 logger.debug(
-                    f"Found library: {section.title} ({section.type}) - {section.locations}"
+                    "Found library: {} ({}) - {}",
+                    section.title,
+                    section.type,
+                    section.locations,
                 )
 
             logger.info(f"Successfully retrieved {len(sections)} library sections")
-            return sections
+            return tuple(sections)
 
         except PlexApiException as e:
             logger.error(f"Error fetching library sections: {e}")
-            return []
+            return ()
         except Exception as e:
             logger.error(f"Unexpected error fetching library sections: {e}")
-            return []
-
-    def get_library_ids(self) -> Dict[str, str]:
-        sections = self.library_sections
-        return {section.title: section.key for section in sections}
-
-    def get_library_locations(self) -> Dict[str, List[str]]:
-        sections = self.library_sections
-        return {section.title: section.locations for section in sections}
+            return ()
 
     def get_libraries_by_type(self, library_type: str) -> List[LibraryInfo]:
         sections = self.library_sections
         return [section for section in sections if section.library_type == library_type]
 
     def find_library_by_path(self, file_path: str) -> Optional[LibraryInfo]:
-        sections = self.library_sections
-
-        for section in sections:
-            for location in section.locations:
-                if file_path.startswith(location):
-                    return section
-
-        return None
+        # Walk up the path's ancestors so each lookup costs O(depth) dict hits
+        # instead of a startswith() against every location of every section.
+        lookup = self.location_index.get
+        dirname = os.path.dirname
+        path = file_path
+
+        while True:
+            section = lookup(path)
+            if section:
+                return section
+            parent = dirname(path)
+            if parent == path:
+                return None
+            path = parent
 
     def send_scan_request(self, library_key: int, file_path: str) -> None:
         if not self.server:
@@ -101,13 +109,27 @@ class Plex:
 
         try:
             logger.debug(
-                f"Sending scan request for library {library_key} at {file_path}"
+                "Sending scan request for library {} at {}", library_key, file_path
             )
             self.server.library.sectionByID(library_key).update(path=str(file_path))
             logger.info(f"Scan request sent for library {library_key} at {file_path}")
         except PlexApiException as e:
             logger.error(f"Failed to send scan request: {e}")
 
+    def _iter_library_files(
+        self, section, library_key: int
+    ) -> Iterator[Tuple[int, str]]:
+        if section.type == "show":
+            items = (episode for show in section.all() for episode in show.episodes())
+        else:
+            items = section.all()
+
+        for item in items:
+            for media in item.media:
+                for part in media.parts:
+                    if part.file:
+                        yield (library_key, part.file)
+
     def cache_library_files(self, library_key: int) -> None:
         if not self.server:
             logger.error("Plex server is not connected. Cannot cache library files.")
@@ -115,31 +137,52 @@ class Plex:
 
         try:
             section = self.server.library.sectionByID(library_key)
-            logger.debug(f"Caching files for library {section.title} ({library_key})")
-
-            library_files = []
-
-            if section.type == "show":
-                for show in section.all():
-                    for episode in show.episodes():
-                        for media in episode.media:
-                            for part in media.parts:
-                                if part.file:
-                                    library_files.append((library_key, part.file))
-            else:
-                for movie in section.all():
-                    for media in movie.media:
-                        for part in media.parts:
-                            if part.file:
-                                library_files.append((library_key, part.file))
-            self.db.insert_plex_library_files(library_files)
+            logger.debug(
+                "Caching files for library {} ({})", section.title, library_key
+            )
+
+            cached = self.db.insert_plex_library_files(
+                self._iter_library_files(section, library_key)
+            )
             logger.info(
-                f"Cached {len(library_files)} files for library {section.title} ({library_key})"
+                f"Cached {cached} files for library {section.title} ({library_key})"
             )
 
         except PlexApiException as e:
             logger.error(f"Failed to cache library files: {e}")
 
+    def _walk_media_files(self, library_path: str) -> Iterator[str]:
+        # Plain scandir + string ops; building a Path per file dominated the walk.
+        media_extensions = self.media_extensions
+        pending_dirs = [library_path]
+
+        while pending_dirs:
+            dir_path = pending_dirs.pop()
+            try:
+                entries = os.scandir(dir_path)
+            except OSError as e:
+                logger.warning(f"Unable to read directory {dir_path}: {e}")
+                continue
+
+            with entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if is_dir:
+                        if not entry.is_symlink():
+                            pending_dirs.append(entry.path)
+                        continue
+
+                    name = entry.name
+                    if name.startswith("."):
+                        continue
+                    _, dot, extension = name.rpartition(".")
+                    if dot and f".{extension.lower()}" in media_extensions:
+                        yield entry.path
+
     def full_scan(self):
         if not self.server:
             logger.error("Plex server is not connected. Cannot perform initial scan.")
@@ -147,6 +190,8 @@ class Plex:
 
         try:
             logger.debug("Performing initial scan of all libraries")
+            cached_files = self.db.get_cached_library_files()
+            pending_scans = set()
             for library_path in self.local_library_paths:
                 path_obj = Path(library_path)
                 if not path_obj.exists():
@@ -157,29 +202,24 @@ class Plex:
 
                 logger.info(f"Scanning library path: {library_path}")
 
-                for root, dirs, files in os.walk(library_path):
-                    for file in files:
-                        file_path = Path(root) / file
-
-                        if (
-                            file_path.suffix.lower() in self.media_extensions
-                        ) and not file_path.name.startswith("."):
-                            library = self.find_library_by_path(str(file_path))
-                            if library:
-                                is_cached = self.db.cursor.execute(
-                                    "SELECT 1 FROM plex_library_files WHERE library_key = ? AND file_path = ?",
-                                    (library.key, str(file_path)),
-                                ).fetchone()
-
-                                if not is_cached:
-                                    logger.debug(
-                                        f"File {file_path} not cached, sending scan request"
-                                    )
-                                    self.send_scan_request(library.key, str(file_path))
-                            else:
-                                logger.warning(
-                                    f"No library found for file {file_path}. Skipping scan request."
-                                )
+                for file_path in self._walk_media_files(library_path):
+                    library = self.find_library_by_path(file_path)
+                    if library:
+                        if (library.key, file_path) not in cached_files:
+                            logger.debug(
+                                "File {} not cached, queueing scan request", file_path
+                            )
+                            pending_scans.add(
+                                (library.key, os.path.dirname(file_path))
+                            )
+                    else:
+                        logger.warning(
+                            f"No library found for file {file_path}. Skipping scan request."
+                        )
+
+            # Plex scans whole directories, so one request per folder is enough
+            for library_key, dir_path in pending_scans:
+                self.send_scan_request(int(library_key), dir_path)
             logger.info("Initial scan completed successfully.")
 
         except PlexApiException as e:
@@ -1,4 +1,5 @@
-from typing import List
+from functools import cached_property
+from typing import FrozenSet, List
 from pathlib import Path
 from loguru import logger
 
@@ -49,6 +50,10 @@ class Settings(BaseSettings):
         description="Settings for the Plex server connection.",
     )
 
+    @cached_property
+    def media_extensions_set(self) -> FrozenSet[str]:
+        return frozenset(extension.lower() for extension in self.media_extensions)
+
 
 def load_or_create_settings(path: Path) -> Settings:
     if path.exists():